@@ -15,6 +15,7 @@
 from huggingface_hub.utils import validate_hf_hub_args
 
 from .single_file_utils import (
+    close_checkpoint,
     create_diffusers_vae_model_from_ldm,
     fetch_ldm_config_and_checkpoint,
 )
@@ -131,16 +132,17 @@ class FromOriginalVAEMixin:
 
         image_size = kwargs.pop("image_size", None)
         scaling_factor = kwargs.pop("scaling_factor", None)
-        component = create_diffusers_vae_model_from_ldm(
-            class_name,
-            original_config,
-            checkpoint,
-            image_size=image_size,
-            scaling_factor=scaling_factor,
-            torch_dtype=torch_dtype,
-        )
-        vae = component["vae"]
-        if torch_dtype is not None:
-            vae = vae.to(torch_dtype)
+        try:
+            component = create_diffusers_vae_model_from_ldm(
+                class_name,
+                original_config,
+                checkpoint,
+                image_size=image_size,
+                scaling_factor=scaling_factor,
+                torch_dtype=torch_dtype,
+            )
+        finally:
+            close_checkpoint(checkpoint)
 
-        return vae
+        # `create_diffusers_vae_model_from_ldm` already returns the model in `torch_dtype`
+        return component["vae"]
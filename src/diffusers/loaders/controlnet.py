@@ -15,6 +15,7 @@
 from huggingface_hub.utils import validate_hf_hub_args
 
 from .single_file_utils import (
+    close_checkpoint,
     create_diffusers_controlnet_model_from_ldm,
     fetch_ldm_config_and_checkpoint,
 )
@@ -121,16 +122,17 @@ class FromOriginalControlNetMixin:
         upcast_attention = kwargs.pop("upcast_attention", False)
         image_size = kwargs.pop("image_size", None)
 
-        component = create_diffusers_controlnet_model_from_ldm(
-            class_name,
-            original_config,
-            checkpoint,
-            upcast_attention=upcast_attention,
-            image_size=image_size,
-            torch_dtype=torch_dtype,
-        )
-        controlnet = component["controlnet"]
-        if torch_dtype is not None:
-            controlnet = controlnet.to(torch_dtype)
+        try:
+            component = create_diffusers_controlnet_model_from_ldm(
+                class_name,
+                original_config,
+                checkpoint,
+                upcast_attention=upcast_attention,
+                image_size=image_size,
+                torch_dtype=torch_dtype,
+            )
+        finally:
+            close_checkpoint(checkpoint)
 
-        return controlnet
+        # `create_diffusers_controlnet_model_from_ldm` already returns the model in `torch_dtype`
+        return component["controlnet"]
@@ -12,16 +12,27 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-from huggingface_hub.utils import validate_hf_hub_args
+import os
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache, partial
 
-from ..utils import is_transformers_available, logging
+import torch
+from huggingface_hub import hf_hub_download
+from huggingface_hub.utils import EntryNotFoundError, validate_hf_hub_args
+
+from ..utils import DIFFUSERS_SINGLE_FILE_PARALLEL, is_transformers_available, logging
 from .single_file_utils import (
+    DIFFUSERS_MODULE_NAME,
+    MODEL_INIT_LOCK,
+    _get_cached_class,
+    close_checkpoint,
     create_diffusers_unet_model_from_ldm,
     create_diffusers_vae_model_from_ldm,
     create_scheduler_from_ldm,
     create_text_encoders_and_tokenizers_from_ldm,
     fetch_ldm_config_and_checkpoint,
     infer_model_type,
+    set_image_size,
 )
 
 
@@ -34,8 +45,38 @@ REFINER_PIPELINES = [
     "StableDiffusionXLControlNetImg2ImgPipeline",
 ]
 
-if is_transformers_available():
-    from transformers import AutoFeatureExtractor
+# Components that are all created by a single call to `create_text_encoders_and_tokenizers_from_ldm`
+TEXT_ENCODER_COMPONENT_NAMES = ["text_encoder", "text_encoder_2", "tokenizer", "tokenizer_2"]
+
+# Upper bound on the number of sub models that are loaded concurrently
+MAX_PARALLEL_SUB_MODEL_LOADS = 8
+
+SAFETY_CHECKER_REPO_ID = "CompVis/stable-diffusion-safety-checker"
+
+# Classes that the sub model loaders look up lazily through `_get_cached_class`
+LAZILY_RESOLVED_DIFFUSERS_CLASSES = [
+    (DIFFUSERS_MODULE_NAME, "AutoencoderKL"),
+    (DIFFUSERS_MODULE_NAME, "UNet2DConditionModel"),
+    (f"{DIFFUSERS_MODULE_NAME}.pipelines.stable_diffusion.safety_checker", "StableDiffusionSafetyChecker"),
+]
+LAZILY_RESOLVED_TRANSFORMERS_CLASSES = [
+    ("transformers", "AutoFeatureExtractor"),
+    ("transformers", "CLIPTextConfig"),
+    ("transformers", "CLIPTextModel"),
+    ("transformers", "CLIPTextModelWithProjection"),
+    ("transformers", "CLIPTokenizer"),
+]
+
+
+def download_safety_checker(local_files_only=False):
+    # only fetch the config and the weights file that `from_pretrained` would pick instead of the whole repository
+    config_file = hf_hub_download(SAFETY_CHECKER_REPO_ID, "config.json", local_files_only=local_files_only)
+    try:
+        hf_hub_download(SAFETY_CHECKER_REPO_ID, "model.safetensors", local_files_only=local_files_only)
+    except EntryNotFoundError:
+        hf_hub_download(SAFETY_CHECKER_REPO_ID, "pytorch_model.bin", local_files_only=local_files_only)
+
+    return os.path.dirname(config_file)
 
 
 def build_sub_model_components(
@@ -49,15 +90,17 @@ def build_sub_model_components(
     model_type=None,
     image_size=None,
     torch_dtype=None,
-    **kwargs,
+    num_in_channels=None,
+    upcast_attention=None,
+    scaling_factor=None,
+    scheduler_type="ddim",
+    prediction_type=None,
+    device=None,
 ):
     if component_name in pipeline_components:
         return {}
 
     if component_name == "unet":
-        num_in_channels = kwargs.pop("num_in_channels", None)
-        upcast_attention = kwargs.pop("upcast_attention", None)
-
         unet_components = create_diffusers_unet_model_from_ldm(
             pipeline_class_name,
             original_config,
@@ -67,11 +110,11 @@ def build_sub_model_components(
             torch_dtype=torch_dtype,
             model_type=model_type,
             upcast_attention=upcast_attention,
+            device=device,
         )
         return unet_components
 
     if component_name == "vae":
-        scaling_factor = kwargs.get("scaling_factor", None)
         vae_components = create_diffusers_vae_model_from_ldm(
             pipeline_class_name,
             original_config,
@@ -80,13 +123,11 @@ def build_sub_model_components(
             scaling_factor,
             torch_dtype,
             model_type=model_type,
+            device=device,
         )
         return vae_components
 
     if component_name == "scheduler":
-        scheduler_type = kwargs.get("scheduler_type", "ddim")
-        prediction_type = kwargs.get("prediction_type", None)
-
         scheduler_components = create_scheduler_from_ldm(
             pipeline_class_name,
             original_config,
@@ -98,31 +139,37 @@ def build_sub_model_components(
 
         return scheduler_components
 
-    if component_name in ["text_encoder", "text_encoder_2", "tokenizer", "tokenizer_2"]:
+    if component_name in TEXT_ENCODER_COMPONENT_NAMES:
         text_encoder_components = create_text_encoders_and_tokenizers_from_ldm(
             original_config,
             checkpoint,
             model_type=model_type,
             local_files_only=local_files_only,
             torch_dtype=torch_dtype,
+            device=device,
         )
         return text_encoder_components
 
     if component_name == "safety_checker":
         if load_safety_checker:
-            from ..pipelines.stable_diffusion.safety_checker import StableDiffusionSafetyChecker
-
-            safety_checker = StableDiffusionSafetyChecker.from_pretrained(
-                "CompVis/stable-diffusion-safety-checker", local_files_only=local_files_only, torch_dtype=torch_dtype
+            StableDiffusionSafetyChecker = _get_cached_class(
+                f"{DIFFUSERS_MODULE_NAME}.pipelines.stable_diffusion.safety_checker", "StableDiffusionSafetyChecker"
             )
+            # download the safety checker before taking the lock so that the other sub models aren't blocked on it
+            safety_checker_path = download_safety_checker(local_files_only=local_files_only)
+            with MODEL_INIT_LOCK:
+                safety_checker = StableDiffusionSafetyChecker.from_pretrained(
+                    safety_checker_path, torch_dtype=torch_dtype
+                )
         else:
             safety_checker = None
         return {"safety_checker": safety_checker}
 
     if component_name == "feature_extractor":
         if load_safety_checker:
+            AutoFeatureExtractor = _get_cached_class("transformers", "AutoFeatureExtractor")
             feature_extractor = AutoFeatureExtractor.from_pretrained(
-                "CompVis/stable-diffusion-safety-checker", local_files_only=local_files_only
+                SAFETY_CHECKER_REPO_ID, local_files_only=local_files_only
             )
         else:
             feature_extractor = None
@@ -131,6 +178,22 @@ def build_sub_model_components(
     return
 
 
+@lru_cache(maxsize=32)
+def _resolve_pipeline_class(cls):
+    # import here to avoid circular imports
+    from ..pipelines.pipeline_utils import _get_pipeline_class
+
+    # without a config or custom pipeline the resolved class only depends on `cls`
+    return _get_pipeline_class(cls, config=None)
+
+
+@lru_cache(maxsize=128)
+def _cached_signature_keys(cls, pipeline_class):
+    # inspecting the `__init__` signature is comparatively slow and its result never changes for a given class
+    expected_modules, optional_kwargs = cls._get_signature_keys(pipeline_class)
+    return frozenset(expected_modules), frozenset(optional_kwargs)
+
+
 def set_additional_components(
     pipeline_class_name,
     original_config,
@@ -216,6 +279,10 @@ class FromSingleFileMixin:
             prediction_type (`str`, *optional*):
                 The type of prediction to load. If not provided, the prediction type will be inferred from the
                 checkpoint file.
+            device (`str` or `torch.device`, *optional*):
+                The device to load the pipeline on. The sub models are created on this device as their weights are
+                read from the checkpoint. Unless `torch_dtype` is set, the weights of `.safetensors` checkpoints are
+                copied from the file to this device directly. Otherwise they are cast on the CPU first.
             kwargs (remaining dictionary of keyword arguments, *optional*):
                 Can be used to overwrite load and saveable variables (the pipeline components of the specific pipeline
                 class). The overwritten components are passed directly to the pipelines `__init__` method. See example
@@ -252,6 +319,14 @@ class FromSingleFileMixin:
         local_files_only = kwargs.pop("local_files_only", False)
         revision = kwargs.pop("revision", None)
         torch_dtype = kwargs.pop("torch_dtype", None)
+        device = kwargs.pop("device", None)
+
+        # the current CUDA device is set per thread, so resolve it here before the sub models are loaded in other
+        # threads where a bare `"cuda"` would always resolve to the first GPU
+        if device is not None:
+            device = torch.device(device)
+            if device.type == "cuda" and device.index is None:
+                device = torch.device("cuda", torch.cuda.current_device())
 
         class_name = cls.__name__
 
@@ -266,58 +341,121 @@ class FromSingleFileMixin:
             revision=revision,
             local_files_only=local_files_only,
             cache_dir=cache_dir,
+            device=device,
+            torch_dtype=torch_dtype,
         )
 
-        from ..pipelines.pipeline_utils import _get_pipeline_class
-
-        pipeline_class = _get_pipeline_class(
-            cls,
-            config=None,
-            cache_dir=cache_dir,
-        )
-
-        expected_modules, optional_kwargs = cls._get_signature_keys(pipeline_class)
-        passed_class_obj = {k: kwargs.pop(k) for k in expected_modules if k in kwargs}
-        passed_pipe_kwargs = {k: kwargs.pop(k) for k in optional_kwargs if k in kwargs}
+        try:
+            pipeline_class = _resolve_pipeline_class(cls)
+
+            expected_modules, optional_kwargs = _cached_signature_keys(cls, pipeline_class)
+
+            # split the kwargs into pipeline components, pipeline arguments and loading options in a single pass
+            passed_class_obj = {}
+            passed_pipe_kwargs = {}
+            remaining_kwargs = {}
+            for name, value in kwargs.items():
+                if name in expected_modules:
+                    passed_class_obj[name] = value
+                elif name in optional_kwargs:
+                    passed_pipe_kwargs[name] = value
+                else:
+                    remaining_kwargs[name] = value
+            kwargs = remaining_kwargs
+
+            model_type = kwargs.pop("model_type", None)
+            image_size = kwargs.pop("image_size", None)
+            load_safety_checker = (kwargs.pop("load_safety_checker", False)) or (
+                passed_class_obj.get("safety_checker", None) is not None
+            )
+            num_in_channels = kwargs.pop("num_in_channels", None)
+            upcast_attention = kwargs.pop("upcast_attention", None)
+            scaling_factor = kwargs.pop("scaling_factor", None)
+            scheduler_type = kwargs.pop("scheduler_type", "ddim")
+            prediction_type = kwargs.pop("prediction_type", None)
+
+            # `model_type` and `image_size` are the same for every sub model, so resolve them once before the loop
+            # instead of letting each `create_*_from_ldm` function infer them again from the config
+            if any(name not in passed_class_obj for name in expected_modules):
+                model_type = infer_model_type(original_config, checkpoint=checkpoint, model_type=model_type)
+                image_size = set_image_size(
+                    class_name, original_config, checkpoint, image_size=image_size, model_type=model_type
+                )
 
-        model_type = kwargs.pop("model_type", None)
-        image_size = kwargs.pop("image_size", None)
-        load_safety_checker = (kwargs.pop("load_safety_checker", False)) or (
-            passed_class_obj.get("safety_checker", None) is not None
-        )
+            # the text encoders and tokenizers are created together, so only schedule one load for all of them
+            sub_model_names = {}
+            for name in expected_modules:
+                if name in passed_class_obj:
+                    continue
+                load_key = "text_encoders" if name in TEXT_ENCODER_COMPONENT_NAMES else name
+                sub_model_names.setdefault(load_key, name)
+
+            load_sub_model = partial(
+                build_sub_model_components,
+                passed_class_obj,
+                class_name,
+                original_config=original_config,
+                checkpoint=checkpoint,
+                model_type=model_type,
+                image_size=image_size,
+                load_safety_checker=load_safety_checker,
+                local_files_only=local_files_only,
+                torch_dtype=torch_dtype,
+                num_in_channels=num_in_channels,
+                upcast_attention=upcast_attention,
+                scaling_factor=scaling_factor,
+                scheduler_type=scheduler_type,
+                prediction_type=prediction_type,
+                device=device,
+            )
 
-        init_kwargs = {}
-        for name in expected_modules:
-            if name in passed_class_obj:
-                init_kwargs[name] = passed_class_obj[name]
+            # Loading a sub model is dominated by config downloads and tensor copies that release the GIL, so the
+            # sub models are loaded concurrently. Set `DIFFUSERS_SINGLE_FILE_PARALLEL=0` to load them one by one.
+            if DIFFUSERS_SINGLE_FILE_PARALLEL and len(sub_model_names) > 1:
+                # importing the same modules for the first time from several threads at once can fail with partially
+                # initialized modules, so resolve the classes that the sub model loaders need on this thread first
+                lazily_resolved_classes = LAZILY_RESOLVED_DIFFUSERS_CLASSES
+                if is_transformers_available():
+                    lazily_resolved_classes = lazily_resolved_classes + LAZILY_RESOLVED_TRANSFORMERS_CLASSES
+                for library_name, lazy_class_name in lazily_resolved_classes:
+                    _get_cached_class(library_name, lazy_class_name)
+
+                max_workers = min(MAX_PARALLEL_SUB_MODEL_LOADS, len(sub_model_names))
+                with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                    futures = [executor.submit(load_sub_model, name) for name in sub_model_names.values()]
+                    sub_models = [future.result() for future in futures]
             else:
-                components = build_sub_model_components(
-                    init_kwargs,
-                    class_name,
-                    name,
-                    original_config,
-                    checkpoint,
-                    model_type=model_type,
-                    image_size=image_size,
-                    load_safety_checker=load_safety_checker,
-                    local_files_only=local_files_only,
-                    torch_dtype=torch_dtype,
-                    **kwargs,
-                )
+                sub_models = [load_sub_model(name) for name in sub_model_names.values()]
+
+            init_kwargs = {}
+            for components in sub_models:
                 if not components:
                     continue
                 init_kwargs.update(components)
 
-        additional_components = set_additional_components(
-            class_name, original_config, checkpoint=checkpoint, model_type=model_type
-        )
-        if additional_components:
-            init_kwargs.update(additional_components)
-
-        init_kwargs.update(passed_pipe_kwargs)
-        pipe = pipeline_class(**init_kwargs)
+            # components passed by the user take precedence over components that were created alongside another one
+            init_kwargs.update(passed_class_obj)
 
-        if torch_dtype is not None:
+            additional_components = set_additional_components(
+                class_name, original_config, checkpoint=checkpoint, model_type=model_type
+            )
+            if additional_components:
+                init_kwargs.update(additional_components)
+
+            init_kwargs.update(passed_pipe_kwargs)
+            pipe = pipeline_class(**init_kwargs)
+        finally:
+            # release the memory-mapped checkpoint file whether or not the pipeline could be loaded
+            close_checkpoint(checkpoint)
+
+        # the sub models created from the checkpoint are already in `torch_dtype`, so only the components passed by
+        # the user still need to be cast
+        if torch_dtype is not None and passed_class_obj:
             pipe.to(dtype=torch_dtype)
 
+        # the sub models are created on `device` already, this moves the components and buffers that weren't loaded
+        # from the checkpoint such as the safety checker
+        if device is not None:
+            pipe.to(device)
+
         return pipe
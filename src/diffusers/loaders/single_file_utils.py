@@ -14,16 +14,25 @@
 # limitations under the License.
 """Conversion script for the Stable Diffusion checkpoints."""
 
+import copy
+import importlib
 import os
 import re
+import sys
+import threading
+import zipfile
+from collections.abc import MutableMapping
 from contextlib import nullcontext
+from functools import lru_cache
 from io import BytesIO
 from urllib.parse import urlparse
 
 import requests
+import safetensors
+import torch
 import yaml
 
-from ..models.modeling_utils import load_state_dict
+from ..models.modeling_utils import _TORCH_LOAD_KWARGS, _raise_checkpoint_load_error, load_state_dict
 from ..schedulers import (
     DDIMScheduler,
     DDPMScheduler,
@@ -35,18 +44,15 @@ from ..schedulers import (
     LMSDiscreteScheduler,
     PNDMScheduler,
 )
-from ..utils import is_accelerate_available, is_transformers_available, logging
+from ..utils import (
+    SAFETENSORS_FILE_EXTENSION,
+    is_accelerate_available,
+    is_torch_version,
+    logging,
+)
 from ..utils.hub_utils import _get_model_file
 
 
-if is_transformers_available():
-    from transformers import (
-        CLIPTextConfig,
-        CLIPTextModel,
-        CLIPTextModelWithProjection,
-        CLIPTokenizer,
-    )
-
 if is_accelerate_available():
     from accelerate import init_empty_weights
 
@@ -54,6 +60,14 @@ if is_accelerate_available():
 
 logger = logging.get_logger(__name__)  # pylint: disable=invalid-name
 
+# `init_empty_weights` patches `torch.nn.Module.register_parameter` globally, so sub models that are loaded in
+# parallel by `FromSingleFileMixin.from_single_file` must not be instantiated at the same time
+MODEL_INIT_LOCK = threading.Lock()
+
+# From PyTorch 2.1 onwards checkpoints can be memory-mapped, and `load_state_dict(..., assign=True)` reuses the
+# checkpoint tensors instead of copying them into the freshly initialized parameters
+_TORCH_SUPPORTS_MMAP_AND_ASSIGN = is_torch_version(">=", "2.1.0")
+
 CONFIG_URLS = {
     "v1": "https://raw.githubusercontent.com/CompVis/stable-diffusion/main/configs/stable-diffusion/v1-inference.yaml",
     "v2": "https://raw.githubusercontent.com/Stability-AI/stablediffusion/main/configs/stable-diffusion/v2-inference-v.yaml",
@@ -83,6 +97,16 @@ SCHEDULER_DEFAULT_CONFIG = {
     "timestep_spacing": "leading",
 }
 
+SCHEDULER_TYPE_TO_CLASS = {
+    "pndm": PNDMScheduler,
+    "lms": LMSDiscreteScheduler,
+    "heun": HeunDiscreteScheduler,
+    "euler": EulerDiscreteScheduler,
+    "euler-ancestral": EulerAncestralDiscreteScheduler,
+    "dpm": DPMSolverMultistepScheduler,
+    "ddim": DDIMScheduler,
+}
+
 
 STABLE_CASCADE_DEFAULT_CONFIGS = {
     "stage_c": {"pretrained_model_name_or_path": "diffusers/stable-cascade-configs", "subfolder": "prior"},
@@ -284,13 +308,30 @@ SD_2_TEXT_ENCODER_KEYS_TO_IGNORE = [
 
 VALID_URL_PREFIXES = ["https://huggingface.co/", "huggingface.co/", "hf.co/", "https://hf.co/"]
 
+DIFFUSERS_MODULE_NAME = __name__.split(".")[0]
+
+
+def _cached_import(name):
+    # `sys.modules` lookups skip the import lock and the dotted-path walk done by `importlib.import_module`
+    module = sys.modules.get(name)
+    if module is None:
+        module = importlib.import_module(name)
+    return module
+
+
+@lru_cache(maxsize=None)
+def _get_cached_class(library_name, class_name):
+    return getattr(_cached_import(library_name), class_name)
+
 
 def _extract_repo_id_and_weights_name(pretrained_model_name_or_path):
     pattern = r"([^/]+)/([^/]+)/(?:blob/main/)?(.+)"
     weights_name = None
     repo_id = (None,)
     for prefix in VALID_URL_PREFIXES:
-        pretrained_model_name_or_path = pretrained_model_name_or_path.replace(prefix, "")
+        if pretrained_model_name_or_path.startswith(prefix):
+            pretrained_model_name_or_path = pretrained_model_name_or_path[len(prefix) :]
+            break
     match = re.match(pattern, pretrained_model_name_or_path)
     if not match:
         return repo_id, weights_name
@@ -312,6 +353,8 @@ def fetch_ldm_config_and_checkpoint(
     cache_dir=None,
     local_files_only=None,
     revision=None,
+    device=None,
+    torch_dtype=None,
 ):
     checkpoint = load_single_file_model_checkpoint(
         pretrained_model_link_or_path,
@@ -322,12 +365,154 @@ def fetch_ldm_config_and_checkpoint(
         cache_dir=cache_dir,
         local_files_only=local_files_only,
         revision=revision,
+        device=device,
+        torch_dtype=torch_dtype,
     )
-    original_config = fetch_original_config(class_name, checkpoint, original_config_file)
+    try:
+        original_config = fetch_original_config(class_name, checkpoint, original_config_file)
+    except Exception:
+        # the callers only close the checkpoint once it has been returned to them
+        close_checkpoint(checkpoint)
+        raise
 
     return original_config, checkpoint
 
 
+class LazySafetensorsStateDict(MutableMapping):
+    """
+    Dict-like view of a `.safetensors` checkpoint. Tensors are read from the memory-mapped file when they are
+    accessed instead of materializing the whole state dict up front, so the checkpoint doesn't have to be held in CPU
+    memory next to the converted sub models. When a `device` is given, each tensor is moved to that device as it is
+    read. When a `torch_dtype` is given, floating point tensors are cast on the CPU before they are moved, so that
+    only the cast tensor is allocated on `device`.
+    """
+
+    def __init__(self, checkpoint_file, device=None, torch_dtype=None):
+        device = str(device) if device is not None else "cpu"
+        # without a dtype to cast to, safetensors can copy the tensors straight from the file to `device`
+        handle_device = device if torch_dtype is None else "cpu"
+        self._handle = safetensors.safe_open(checkpoint_file, framework="pt", device=handle_device)
+        self._device = device
+        self._torch_dtype = torch_dtype
+        self._keys = dict.fromkeys(self._handle.keys())
+        self._overrides = {}
+
+    def __getitem__(self, key):
+        if key in self._overrides:
+            return self._overrides[key]
+        if key not in self._keys:
+            raise KeyError(key)
+
+        tensor = self._handle.get_tensor(key)
+        if self._torch_dtype is not None:
+            dtype = self._torch_dtype if tensor.is_floating_point() else tensor.dtype
+            tensor = tensor.to(dtype=dtype).to(self._device)
+        return tensor
+
+    def __setitem__(self, key, value):
+        self._keys[key] = None
+        self._overrides[key] = value
+
+    def __delitem__(self, key):
+        del self._keys[key]
+        self._overrides.pop(key, None)
+
+    def __contains__(self, key):
+        return key in self._keys
+
+    def __iter__(self):
+        # iterate over a snapshot of the keys so that entries can be popped while iterating
+        return iter(list(self._keys))
+
+    def __len__(self):
+        return len(self._keys)
+
+    def close(self):
+        self._handle.__exit__(None, None, None)
+
+
+class StateDictPrefixView(MutableMapping):
+    """
+    View of the entries of a state dict whose keys start with `prefix`, with the prefix stripped from the keys. Values
+    are looked up in the underlying state dict when they are accessed, so the converters don't have to collect the
+    tensors of a sub model into an intermediate dict. The view never modifies the state dict, which is shared by the
+    sub models that are converted concurrently: entries that are set or removed only change the view itself.
+    """
+
+    def __init__(self, state_dict, prefix):
+        self._state_dict = state_dict
+        prefix_length = len(prefix)
+        self._keys = {key[prefix_length:]: key for key in list(state_dict.keys()) if key.startswith(prefix)}
+        self._overrides = {}
+
+    def __getitem__(self, key):
+        if key in self._overrides:
+            return self._overrides[key]
+        return self._state_dict[self._keys[key]]
+
+    def __setitem__(self, key, value):
+        self._keys[key] = None
+        self._overrides[key] = value
+
+    def __delitem__(self, key):
+        del self._keys[key]
+        self._overrides.pop(key, None)
+
+    def __contains__(self, key):
+        return key in self._keys
+
+    def __iter__(self):
+        # iterate over a snapshot of the keys so that entries can be popped while iterating
+        return iter(list(self._keys))
+
+    def __len__(self):
+        return len(self._keys)
+
+
+def close_checkpoint(checkpoint):
+    # only checkpoints that are read lazily from a `.safetensors` file keep the file open
+    if isinstance(checkpoint, LazySafetensorsStateDict):
+        checkpoint.close()
+
+
+def assign_state_dict_to_model(model, state_dict, torch_dtype=None):
+    """
+    Loads `state_dict` into a model that was instantiated without accelerate. When supported, the checkpoint tensors
+    are assigned to the model instead of being copied into its parameters.
+    """
+    if not _TORCH_SUPPORTS_MMAP_AND_ASSIGN:
+        model.load_state_dict(state_dict)
+        return
+
+    # `assign=True` keeps the dtype of the checkpoint tensors, so cast them to the dtype that the parameters are
+    # loaded in by `load_model_dict_into_meta` to avoid ending up with a mix of dtypes in the model
+    dtype = torch_dtype or torch.float32
+    state_dict = {
+        key: value.to(dtype) if torch.is_floating_point(value) else value for key, value in state_dict.items()
+    }
+    model.load_state_dict(state_dict, assign=True)
+
+
+def load_checkpoint_file(checkpoint_file, device=None, torch_dtype=None):
+    file_extension = os.path.basename(checkpoint_file).split(".")[-1]
+    if file_extension == SAFETENSORS_FILE_EXTENSION:
+        try:
+            return LazySafetensorsStateDict(checkpoint_file, device=device, torch_dtype=torch_dtype)
+        except Exception as e:
+            _raise_checkpoint_load_error(checkpoint_file, e)
+
+    # `.ckpt` files often carry EMA weights and optimizer states as well, so they stay memory-mapped on the CPU and
+    # only the tensors that are used get moved to `device` and cast to `torch_dtype` when they are assigned to a model.
+    # Checkpoints that were not saved with the zipfile serialization can't be memory-mapped and are loaded in full.
+    if _TORCH_SUPPORTS_MMAP_AND_ASSIGN and zipfile.is_zipfile(checkpoint_file):
+        try:
+            return torch.load(checkpoint_file, map_location="cpu", mmap=True, **_TORCH_LOAD_KWARGS)
+        except Exception as e:
+            _raise_checkpoint_load_error(checkpoint_file, e)
+
+    return load_state_dict(checkpoint_file)
+
+
 def load_single_file_model_checkpoint(
     pretrained_model_link_or_path,
     resume_download=False,
@@ -337,9 +522,11 @@ def load_single_file_model_checkpoint(
     cache_dir=None,
     local_files_only=None,
     revision=None,
+    device=None,
+    torch_dtype=None,
 ):
     if os.path.isfile(pretrained_model_link_or_path):
-        checkpoint = load_state_dict(pretrained_model_link_or_path)
+        checkpoint = load_checkpoint_file(pretrained_model_link_or_path, device=device, torch_dtype=torch_dtype)
     else:
         repo_id, weights_name = _extract_repo_id_and_weights_name(pretrained_model_link_or_path)
         checkpoint_path = _get_model_file(
@@ -353,7 +540,7 @@ def load_single_file_model_checkpoint(
             token=token,
             revision=revision,
         )
-        checkpoint = load_state_dict(checkpoint_path)
+        checkpoint = load_checkpoint_file(checkpoint_path, device=device, torch_dtype=torch_dtype)
 
     # some checkpoints contain the model state dict under a "state_dict" key
     while "state_dict" in checkpoint:
@@ -362,7 +549,7 @@ def load_single_file_model_checkpoint(
     return checkpoint
 
 
-def infer_original_config_file(class_name, checkpoint):
+def infer_original_config_url(class_name, checkpoint):
     if CHECKPOINT_KEY_NAMES["v2"] in checkpoint and checkpoint[CHECKPOINT_KEY_NAMES["v2"]].shape[-1] == 1024:
         config_url = CONFIG_URLS["v2"]
 
@@ -381,9 +568,17 @@ def infer_original_config_file(class_name, checkpoint):
     else:
         config_url = CONFIG_URLS["v1"]
 
-    original_config_file = BytesIO(requests.get(config_url).content)
+    return config_url
+
 
-    return original_config_file
+@lru_cache(maxsize=None)
+def _load_original_config_from_url(config_url):
+    # the original configs are small and immutable, so each of them is only fetched and parsed once per process
+    # instead of doing an HTTP round-trip on every `from_single_file` call
+    response = requests.get(config_url)
+    response.raise_for_status()
+
+    return yaml.safe_load(BytesIO(response.content))
 
 
 def fetch_original_config(pipeline_class_name, checkpoint, original_config_file=None):
@@ -395,20 +590,20 @@ def fetch_original_config(pipeline_class_name, checkpoint, original_config_file=
         return False
 
     if original_config_file is None:
-        original_config_file = infer_original_config_file(pipeline_class_name, checkpoint)
+        original_config_file = infer_original_config_url(pipeline_class_name, checkpoint)
 
-    elif os.path.isfile(original_config_file):
+    if os.path.isfile(original_config_file):
         with open(original_config_file, "r") as fp:
-            original_config_file = fp.read()
+            original_config = yaml.safe_load(fp.read())
 
     elif is_valid_url(original_config_file):
-        original_config_file = BytesIO(requests.get(original_config_file).content)
+        # the parsed config is shared between all checkpoints that map to the same URL, so callers get their own copy
+        # to modify
+        original_config = copy.deepcopy(_load_original_config_from_url(original_config_file))
 
     else:
         raise ValueError("Invalid `original_config_file` provided. Please set it to a valid file path or URL.")
 
-    original_config = yaml.safe_load(original_config_file)
-
     return original_config
 
 
@@ -445,7 +640,8 @@ def infer_model_type(original_config, checkpoint, model_type=None):
 
 
 def get_default_scheduler_config():
-    return SCHEDULER_DEFAULT_CONFIG
+    # return a copy, the config is modified per checkpoint and must not leak into the next load
+    return SCHEDULER_DEFAULT_CONFIG.copy()
 
 
 def set_image_size(pipeline_class_name, original_config, checkpoint, image_size=None, model_type=None):
@@ -695,9 +891,7 @@ def convert_ldm_unet_checkpoint(checkpoint, config, extract_ema=False):
                 "In this conversion only the non-EMA weights are extracted. If you want to instead extract the EMA"
                 " weights (usually better for inference), please make sure to add the `--extract_ema` flag."
             )
-        for key in keys:
-            if key.startswith(unet_key):
-                unet_state_dict[key.replace(unet_key, "")] = checkpoint.pop(key)
+        unet_state_dict = StateDictPrefixView(checkpoint, unet_key)
 
     new_checkpoint = {}
     ldm_unet_keys = DIFFUSERS_TO_LDM_MAPPING["unet"]["layers"]
@@ -843,12 +1037,7 @@ def convert_controlnet_checkpoint(
         controlnet_state_dict = checkpoint
 
     else:
-        controlnet_state_dict = {}
-        keys = list(checkpoint.keys())
-        controlnet_key = LDM_CONTROLNET_KEY
-        for key in keys:
-            if key.startswith(controlnet_key):
-                controlnet_state_dict[key.replace(controlnet_key, "")] = checkpoint.pop(key)
+        controlnet_state_dict = StateDictPrefixView(checkpoint, LDM_CONTROLNET_KEY)
 
     new_checkpoint = {}
     ldm_controlnet_keys = DIFFUSERS_TO_LDM_MAPPING["controlnet"]["layers"]
@@ -962,10 +1151,16 @@ def convert_controlnet_checkpoint(
 
 
 def create_diffusers_controlnet_model_from_ldm(
-    pipeline_class_name, original_config, checkpoint, upcast_attention=False, image_size=None, torch_dtype=None
+    pipeline_class_name,
+    original_config,
+    checkpoint,
+    upcast_attention=False,
+    image_size=None,
+    torch_dtype=None,
+    device=None,
 ):
-    # import here to avoid circular imports
-    from ..models import ControlNetModel
+    # resolved lazily to avoid circular imports
+    ControlNetModel = _get_cached_class(DIFFUSERS_MODULE_NAME, "ControlNetModel")
 
     image_size = set_image_size(pipeline_class_name, original_config, checkpoint, image_size=image_size)
 
@@ -975,12 +1170,12 @@ def create_diffusers_controlnet_model_from_ldm(
     diffusers_format_controlnet_checkpoint = convert_controlnet_checkpoint(checkpoint, diffusers_config)
 
     ctx = init_empty_weights if is_accelerate_available() else nullcontext
-    with ctx():
+    with MODEL_INIT_LOCK, ctx():
         controlnet = ControlNetModel(**diffusers_config)
 
     if is_accelerate_available():
         unexpected_keys = load_model_dict_into_meta(
-            controlnet, diffusers_format_controlnet_checkpoint, dtype=torch_dtype
+            controlnet, diffusers_format_controlnet_checkpoint, device=device, dtype=torch_dtype
         )
         if controlnet._keys_to_ignore_on_load_unexpected is not None:
             for pat in controlnet._keys_to_ignore_on_load_unexpected:
@@ -991,7 +1186,7 @@ def create_diffusers_controlnet_model_from_ldm(
                 f"Some weights of the model checkpoint were not used when initializing {controlnet.__name__}: \n {[', '.join(unexpected_keys)]}"
             )
     else:
-        controlnet.load_state_dict(diffusers_format_controlnet_checkpoint)
+        assign_state_dict_to_model(controlnet, diffusers_format_controlnet_checkpoint, torch_dtype=torch_dtype)
 
     if torch_dtype is not None:
         controlnet = controlnet.to(torch_dtype)
@@ -1034,12 +1229,9 @@ def update_vae_attentions_ldm_to_diffusers(keys, new_checkpoint, checkpoint, map
 def convert_ldm_vae_checkpoint(checkpoint, config):
     # extract state dict for VAE
     # remove the LDM_VAE_KEY prefix from the ldm checkpoint keys so that it is easier to map them to diffusers keys
-    vae_state_dict = {}
     keys = list(checkpoint.keys())
     vae_key = LDM_VAE_KEY if any(k.startswith(LDM_VAE_KEY) for k in keys) else ""
-    for key in keys:
-        if key.startswith(vae_key):
-            vae_state_dict[key.replace(vae_key, "")] = checkpoint.get(key)
+    vae_state_dict = StateDictPrefixView(checkpoint, vae_key)
 
     new_checkpoint = {}
     vae_diffusers_ldm_map = DIFFUSERS_TO_LDM_MAPPING["vae"]
@@ -1131,7 +1323,12 @@ def convert_ldm_vae_checkpoint(checkpoint, config):
     return new_checkpoint
 
 
-def create_text_encoder_from_ldm_clip_checkpoint(config_name, checkpoint, local_files_only=False, torch_dtype=None):
+def create_text_encoder_from_ldm_clip_checkpoint(
+    config_name, checkpoint, local_files_only=False, torch_dtype=None, device=None
+):
+    CLIPTextConfig = _get_cached_class("transformers", "CLIPTextConfig")
+    CLIPTextModel = _get_cached_class("transformers", "CLIPTextModel")
+
     try:
         config = CLIPTextConfig.from_pretrained(config_name, local_files_only=local_files_only)
     except Exception:
@@ -1140,7 +1337,7 @@ def create_text_encoder_from_ldm_clip_checkpoint(config_name, checkpoint, local_
         )
 
     ctx = init_empty_weights if is_accelerate_available() else nullcontext
-    with ctx():
+    with MODEL_INIT_LOCK, ctx():
         text_model = CLIPTextModel(config)
 
     keys = list(checkpoint.keys())
@@ -1155,7 +1352,7 @@ def create_text_encoder_from_ldm_clip_checkpoint(config_name, checkpoint, local_
                 text_model_dict[diffusers_key] = checkpoint[key]
 
     if is_accelerate_available():
-        unexpected_keys = load_model_dict_into_meta(text_model, text_model_dict, dtype=torch_dtype)
+        unexpected_keys = load_model_dict_into_meta(text_model, text_model_dict, device=device, dtype=torch_dtype)
         if text_model._keys_to_ignore_on_load_unexpected is not None:
             for pat in text_model._keys_to_ignore_on_load_unexpected:
                 unexpected_keys = [k for k in unexpected_keys if re.search(pat, k) is None]
@@ -1168,7 +1365,7 @@ def create_text_encoder_from_ldm_clip_checkpoint(config_name, checkpoint, local_
         if not (hasattr(text_model, "embeddings") and hasattr(text_model.embeddings.position_ids)):
             text_model_dict.pop("text_model.embeddings.position_ids", None)
 
-        text_model.load_state_dict(text_model_dict)
+        assign_state_dict_to_model(text_model, text_model_dict, torch_dtype=torch_dtype)
 
     if torch_dtype is not None:
         text_model = text_model.to(torch_dtype)
@@ -1183,8 +1380,13 @@ def create_text_encoder_from_open_clip_checkpoint(
     has_projection=False,
     local_files_only=False,
     torch_dtype=None,
+    device=None,
     **config_kwargs,
 ):
+    CLIPTextConfig = _get_cached_class("transformers", "CLIPTextConfig")
+    CLIPTextModel = _get_cached_class("transformers", "CLIPTextModel")
+    CLIPTextModelWithProjection = _get_cached_class("transformers", "CLIPTextModelWithProjection")
+
     try:
         config = CLIPTextConfig.from_pretrained(config_name, **config_kwargs, local_files_only=local_files_only)
     except Exception:
@@ -1193,7 +1395,7 @@ def create_text_encoder_from_open_clip_checkpoint(
         )
 
     ctx = init_empty_weights if is_accelerate_available() else nullcontext
-    with ctx():
+    with MODEL_INIT_LOCK, ctx():
         text_model = CLIPTextModelWithProjection(config) if has_projection else CLIPTextModel(config)
 
     text_model_dict = {}
@@ -1248,7 +1450,7 @@ def create_text_encoder_from_open_clip_checkpoint(
             text_model_dict[diffusers_key] = checkpoint[key]
 
     if is_accelerate_available():
-        unexpected_keys = load_model_dict_into_meta(text_model, text_model_dict, dtype=torch_dtype)
+        unexpected_keys = load_model_dict_into_meta(text_model, text_model_dict, device=device, dtype=torch_dtype)
         if text_model._keys_to_ignore_on_load_unexpected is not None:
             for pat in text_model._keys_to_ignore_on_load_unexpected:
                 unexpected_keys = [k for k in unexpected_keys if re.search(pat, k) is None]
@@ -1262,7 +1464,7 @@ def create_text_encoder_from_open_clip_checkpoint(
         if not (hasattr(text_model, "embeddings") and hasattr(text_model.embeddings.position_ids)):
             text_model_dict.pop("text_model.embeddings.position_ids", None)
 
-        text_model.load_state_dict(text_model_dict)
+        assign_state_dict_to_model(text_model, text_model_dict, torch_dtype=torch_dtype)
 
     if torch_dtype is not None:
         text_model = text_model.to(torch_dtype)
@@ -1280,8 +1482,9 @@ def create_diffusers_unet_model_from_ldm(
     image_size=None,
     torch_dtype=None,
     model_type=None,
+    device=None,
 ):
-    from ..models import UNet2DConditionModel
+    UNet2DConditionModel = _get_cached_class(DIFFUSERS_MODULE_NAME, "UNet2DConditionModel")
 
     if num_in_channels is None:
         if pipeline_class_name in [
@@ -1309,11 +1512,13 @@ def create_diffusers_unet_model_from_ldm(
     diffusers_format_unet_checkpoint = convert_ldm_unet_checkpoint(checkpoint, unet_config, extract_ema=extract_ema)
     ctx = init_empty_weights if is_accelerate_available() else nullcontext
 
-    with ctx():
+    with MODEL_INIT_LOCK, ctx():
         unet = UNet2DConditionModel(**unet_config)
 
     if is_accelerate_available():
-        unexpected_keys = load_model_dict_into_meta(unet, diffusers_format_unet_checkpoint, dtype=torch_dtype)
+        unexpected_keys = load_model_dict_into_meta(
+            unet, diffusers_format_unet_checkpoint, device=device, dtype=torch_dtype
+        )
         if unet._keys_to_ignore_on_load_unexpected is not None:
             for pat in unet._keys_to_ignore_on_load_unexpected:
                 unexpected_keys = [k for k in unexpected_keys if re.search(pat, k) is None]
@@ -1323,7 +1528,7 @@ def create_diffusers_unet_model_from_ldm(
                 f"Some weights of the model checkpoint were not used when initializing {unet.__name__}: \n {[', '.join(unexpected_keys)]}"
             )
     else:
-        unet.load_state_dict(diffusers_format_unet_checkpoint)
+        assign_state_dict_to_model(unet, diffusers_format_unet_checkpoint, torch_dtype=torch_dtype)
 
     if torch_dtype is not None:
         unet = unet.to(torch_dtype)
@@ -1339,9 +1544,10 @@ def create_diffusers_vae_model_from_ldm(
     scaling_factor=None,
     torch_dtype=None,
     model_type=None,
+    device=None,
 ):
-    # import here to avoid circular imports
-    from ..models import AutoencoderKL
+    # resolved lazily to avoid circular imports
+    AutoencoderKL = _get_cached_class(DIFFUSERS_MODULE_NAME, "AutoencoderKL")
 
     image_size = set_image_size(
         pipeline_class_name, original_config, checkpoint, image_size=image_size, model_type=model_type
@@ -1369,11 +1575,13 @@ def create_diffusers_vae_model_from_ldm(
     diffusers_format_vae_checkpoint = convert_ldm_vae_checkpoint(checkpoint, vae_config)
     ctx = init_empty_weights if is_accelerate_available() else nullcontext
 
-    with ctx():
+    with MODEL_INIT_LOCK, ctx():
         vae = AutoencoderKL(**vae_config)
 
     if is_accelerate_available():
-        unexpected_keys = load_model_dict_into_meta(vae, diffusers_format_vae_checkpoint, dtype=torch_dtype)
+        unexpected_keys = load_model_dict_into_meta(
+            vae, diffusers_format_vae_checkpoint, device=device, dtype=torch_dtype
+        )
         if vae._keys_to_ignore_on_load_unexpected is not None:
             for pat in vae._keys_to_ignore_on_load_unexpected:
                 unexpected_keys = [k for k in unexpected_keys if re.search(pat, k) is None]
@@ -1383,7 +1591,7 @@ def create_diffusers_vae_model_from_ldm(
                 f"Some weights of the model checkpoint were not used when initializing {vae.__name__}: \n {[', '.join(unexpected_keys)]}"
             )
     else:
-        vae.load_state_dict(diffusers_format_vae_checkpoint)
+        assign_state_dict_to_model(vae, diffusers_format_vae_checkpoint, torch_dtype=torch_dtype)
 
     if torch_dtype is not None:
         vae = vae.to(torch_dtype)
@@ -1397,7 +1605,9 @@ def create_text_encoders_and_tokenizers_from_ldm(
     model_type=None,
     local_files_only=False,
     torch_dtype=None,
+    device=None,
 ):
+    CLIPTokenizer = _get_cached_class("transformers", "CLIPTokenizer")
     model_type = infer_model_type(original_config, checkpoint=checkpoint, model_type=model_type)
 
     if model_type == "FrozenOpenCLIPEmbedder":
@@ -1406,7 +1616,12 @@ def create_text_encoders_and_tokenizers_from_ldm(
 
         try:
             text_encoder = create_text_encoder_from_open_clip_checkpoint(
-                config_name, checkpoint, local_files_only=local_files_only, torch_dtype=torch_dtype, **config_kwargs
+                config_name,
+                checkpoint,
+                local_files_only=local_files_only,
+                torch_dtype=torch_dtype,
+                device=device,
+                **config_kwargs,
             )
             tokenizer = CLIPTokenizer.from_pretrained(
                 config_name, subfolder="tokenizer", local_files_only=local_files_only
@@ -1426,6 +1641,7 @@ def create_text_encoders_and_tokenizers_from_ldm(
                 checkpoint,
                 local_files_only=local_files_only,
                 torch_dtype=torch_dtype,
+                device=device,
             )
             tokenizer = CLIPTokenizer.from_pretrained(config_name, local_files_only=local_files_only)
 
@@ -1450,6 +1666,7 @@ def create_text_encoders_and_tokenizers_from_ldm(
                 has_projection=True,
                 local_files_only=local_files_only,
                 torch_dtype=torch_dtype,
+                device=device,
                 **config_kwargs,
             )
         except Exception:
@@ -1470,7 +1687,7 @@ def create_text_encoders_and_tokenizers_from_ldm(
             config_name = "openai/clip-vit-large-patch14"
             tokenizer = CLIPTokenizer.from_pretrained(config_name, local_files_only=local_files_only)
             text_encoder = create_text_encoder_from_ldm_clip_checkpoint(
-                config_name, checkpoint, local_files_only=local_files_only, torch_dtype=torch_dtype
+                config_name, checkpoint, local_files_only=local_files_only, torch_dtype=torch_dtype, device=device
             )
 
         except Exception:
@@ -1490,6 +1707,7 @@ def create_text_encoders_and_tokenizers_from_ldm(
                 has_projection=True,
                 local_files_only=local_files_only,
                 torch_dtype=torch_dtype,
+                device=device,
                 **config_kwargs,
             )
         except Exception:
@@ -1520,7 +1738,7 @@ def create_scheduler_from_ldm(
 
     global_step = checkpoint["global_step"] if "global_step" in checkpoint else None
 
-    num_train_timesteps = getattr(original_config["model"]["params"], "timesteps", None) or 1000
+    num_train_timesteps = original_config["model"]["params"].get("timesteps", None) or 1000
     scheduler_config["num_train_timesteps"] = num_train_timesteps
 
     if (
@@ -1550,29 +1768,7 @@ def create_scheduler_from_ldm(
         scheduler_config["clip_sample"] = False
         scheduler_config["set_alpha_to_one"] = False
 
-    if scheduler_type == "pndm":
-        scheduler_config["skip_prk_steps"] = True
-        scheduler = PNDMScheduler.from_config(scheduler_config)
-
-    elif scheduler_type == "lms":
-        scheduler = LMSDiscreteScheduler.from_config(scheduler_config)
-
-    elif scheduler_type == "heun":
-        scheduler = HeunDiscreteScheduler.from_config(scheduler_config)
-
-    elif scheduler_type == "euler":
-        scheduler = EulerDiscreteScheduler.from_config(scheduler_config)
-
-    elif scheduler_type == "euler-ancestral":
-        scheduler = EulerAncestralDiscreteScheduler.from_config(scheduler_config)
-
-    elif scheduler_type == "dpm":
-        scheduler = DPMSolverMultistepScheduler.from_config(scheduler_config)
-
-    elif scheduler_type == "ddim":
-        scheduler = DDIMScheduler.from_config(scheduler_config)
-
-    elif scheduler_type == "edm_dpm_solver_multistep":
+    if scheduler_type == "edm_dpm_solver_multistep":
         scheduler_config = {
             "algorithm_type": "dpmsolver++",
             "dynamic_thresholding_ratio": 0.995,
@@ -1592,6 +1788,11 @@ def create_scheduler_from_ldm(
         }
         scheduler = EDMDPMSolverMultistepScheduler(**scheduler_config)
 
+    elif scheduler_type in SCHEDULER_TYPE_TO_CLASS:
+        if scheduler_type == "pndm":
+            scheduler_config["skip_prk_steps"] = True
+        scheduler = SCHEDULER_TYPE_TO_CLASS[scheduler_type].from_config(scheduler_config)
+
     else:
         raise ValueError(f"Scheduler of type {scheduler_type} doesn't exist!")
 
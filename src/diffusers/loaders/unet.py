@@ -45,6 +45,8 @@ from ..utils import (
     set_weights_and_activate_adapters,
 )
 from .single_file_utils import (
+    assign_state_dict_to_model,
+    close_checkpoint,
     convert_stable_cascade_unet_single_file_to_diffusers,
     infer_stable_cascade_single_file_config,
     load_single_file_model_checkpoint,
@@ -1134,26 +1136,29 @@ class FromOriginalUNetMixin:
             revision=revision,
         )
 
-        if config is None:
-            config = infer_stable_cascade_single_file_config(checkpoint)
-            model_config = cls.load_config(**config, **kwargs)
-        else:
-            model_config = config
+        try:
+            if config is None:
+                config = infer_stable_cascade_single_file_config(checkpoint)
+                model_config = cls.load_config(**config, **kwargs)
+            else:
+                model_config = config
 
-        ctx = init_empty_weights if is_accelerate_available() else nullcontext
-        with ctx():
-            model = cls.from_config(model_config, **kwargs)
+            ctx = init_empty_weights if is_accelerate_available() else nullcontext
+            with ctx():
+                model = cls.from_config(model_config, **kwargs)
 
-        diffusers_format_checkpoint = convert_stable_cascade_unet_single_file_to_diffusers(checkpoint)
-        if is_accelerate_available():
-            unexpected_keys = load_model_dict_into_meta(model, diffusers_format_checkpoint, dtype=torch_dtype)
-            if len(unexpected_keys) > 0:
-                logger.warning(
-                    f"Some weights of the model checkpoint were not used when initializing {cls.__name__}: \n {[', '.join(unexpected_keys)]}"
-                )
+            diffusers_format_checkpoint = convert_stable_cascade_unet_single_file_to_diffusers(checkpoint)
+            if is_accelerate_available():
+                unexpected_keys = load_model_dict_into_meta(model, diffusers_format_checkpoint, dtype=torch_dtype)
+                if len(unexpected_keys) > 0:
+                    logger.warning(
+                        f"Some weights of the model checkpoint were not used when initializing {cls.__name__}: \n {[', '.join(unexpected_keys)]}"
+                    )
 
-        else:
-            model.load_state_dict(diffusers_format_checkpoint)
+            else:
+                assign_state_dict_to_model(model, diffusers_format_checkpoint, torch_dtype=torch_dtype)
+        finally:
+            close_checkpoint(checkpoint)
 
         if torch_dtype is not None:
             model.to(torch_dtype)
@@ -54,6 +54,9 @@ if is_torch_version(">=", "1.9.0"):
 else:
     _LOW_CPU_MEM_USAGE_DEFAULT = False
 
+# `weights_only` is only supported by `torch.load` from PyTorch 1.13 onwards
+_TORCH_LOAD_KWARGS = {"weights_only": True} if is_torch_version(">=", "1.13") else {}
+
 
 if is_accelerate_available():
     import accelerate
@@ -61,6 +64,9 @@ if is_accelerate_available():
     from accelerate.utils import get_balanced_memory, get_max_memory, set_module_tensor_to_device
     from accelerate.utils.versions import is_torch_version
 
+    # older versions of `accelerate` can't cast tensors while setting them on a module
+    _SET_MODULE_TENSOR_ACCEPTS_DTYPE = "dtype" in inspect.signature(set_module_tensor_to_device).parameters
+
 
 def get_parameter_device(parameter: torch.nn.Module) -> torch.device:
     try:
@@ -132,30 +138,36 @@ def load_state_dict(checkpoint_file: Union[str, os.PathLike], variant: Optional[
         if file_extension == SAFETENSORS_FILE_EXTENSION:
             return safetensors.torch.load_file(checkpoint_file, device="cpu")
         else:
-            weights_only_kwarg = {"weights_only": True} if is_torch_version(">=", "1.13") else {}
             return torch.load(
                 checkpoint_file,
                 map_location="cpu",
-                **weights_only_kwarg,
+                **_TORCH_LOAD_KWARGS,
             )
     except Exception as e:
-        try:
-            with open(checkpoint_file) as f:
-                if f.read().startswith("version"):
-                    raise OSError(
-                        "You seem to have cloned a repository without having git-lfs installed. Please install "
-                        "git-lfs and run `git lfs install` followed by `git lfs pull` in the folder "
-                        "you cloned."
-                    )
-                else:
-                    raise ValueError(
-                        f"Unable to locate the file {checkpoint_file} which is necessary to load this pretrained "
-                        "model. Make sure you have saved the model properly."
-                    ) from e
-        except (UnicodeDecodeError, ValueError):
-            raise OSError(
-                f"Unable to load weights from checkpoint file for '{checkpoint_file}' " f"at '{checkpoint_file}'. "
-            )
+        _raise_checkpoint_load_error(checkpoint_file, e)
+
+
+def _raise_checkpoint_load_error(checkpoint_file: Union[str, os.PathLike], error: Exception):
+    """
+    Raises a properly formatted error for a checkpoint file that could not be read.
+    """
+    try:
+        with open(checkpoint_file) as f:
+            if f.read().startswith("version"):
+                raise OSError(
+                    "You seem to have cloned a repository without having git-lfs installed. Please install "
+                    "git-lfs and run `git lfs install` followed by `git lfs pull` in the folder "
+                    "you cloned."
+                )
+            else:
+                raise ValueError(
+                    f"Unable to locate the file {checkpoint_file} which is necessary to load this pretrained "
+                    "model. Make sure you have saved the model properly."
+                ) from error
+    except (UnicodeDecodeError, ValueError):
+        raise OSError(
+            f"Unable to load weights from checkpoint file for '{checkpoint_file}' " f"at '{checkpoint_file}'. "
+        )
 
 
 def load_model_dict_into_meta(
@@ -168,8 +180,6 @@ def load_model_dict_into_meta(
     device = device or torch.device("cpu")
     dtype = dtype or torch.float32
 
-    accepts_dtype = "dtype" in set(inspect.signature(set_module_tensor_to_device).parameters.keys())
-
     unexpected_keys = []
     empty_state_dict = model.state_dict()
     for param_name, param in state_dict.items():
@@ -183,7 +193,7 @@ def load_model_dict_into_meta(
                 f"Cannot load {model_name_or_path_str}because {param_name} expected shape {empty_state_dict[param_name]}, but got {param.shape}. If you want to instead overwrite randomly initialized weights, please make sure to pass both `low_cpu_mem_usage=False` and `ignore_mismatched_sizes=True`. For more information, see also: https://github.com/huggingface/diffusers/issues/1619#issuecomment-1345604389 as an example."
             )
 
-        if accepts_dtype:
+        if _SET_MODULE_TENSOR_ACCEPTS_DTYPE:
             set_module_tensor_to_device(model, param_name, device, value=param, dtype=dtype)
         else:
             set_module_tensor_to_device(model, param_name, device, value=param)
@@ -16,6 +16,7 @@
 
 import os
 import re
+import stat
 import sys
 import tempfile
 import traceback
@@ -291,9 +292,15 @@ def _get_model_file(
     commit_hash: Optional[str] = None,
 ):
     pretrained_model_name_or_path = str(pretrained_model_name_or_path)
-    if os.path.isfile(pretrained_model_name_or_path):
+    # a single `stat` call answers both the `isfile` and the `isdir` check, which matters on network file systems
+    try:
+        path_mode = os.stat(pretrained_model_name_or_path).st_mode
+    except (OSError, ValueError):
+        path_mode = 0
+
+    if stat.S_ISREG(path_mode):
         return pretrained_model_name_or_path
-    elif os.path.isdir(pretrained_model_name_or_path):
+    elif stat.S_ISDIR(path_mode):
         if os.path.isfile(os.path.join(pretrained_model_name_or_path, weights_name)):
             # Load from a PyTorch checkpoint
             model_file = os.path.join(pretrained_model_name_or_path, weights_name)
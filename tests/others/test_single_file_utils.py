@@ -0,0 +1,311 @@
+# coding=utf-8
+# Copyright 2024 HuggingFace Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import torch
+from safetensors.torch import save_file
+
+from diffusers.loaders.single_file_utils import (
+    SCHEDULER_DEFAULT_CONFIG,
+    LazySafetensorsStateDict,
+    StateDictPrefixView,
+    _extract_repo_id_and_weights_name,
+    assign_state_dict_to_model,
+    close_checkpoint,
+    create_scheduler_from_ldm,
+    fetch_ldm_config_and_checkpoint,
+    get_default_scheduler_config,
+    load_checkpoint_file,
+    load_single_file_model_checkpoint,
+)
+from diffusers.utils import is_torch_version
+
+
+class LazySafetensorsStateDictTests(unittest.TestCase):
+    def setUp(self):
+        super().setUp()
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.checkpoint_file = os.path.join(self.tmpdir.name, "model.safetensors")
+        save_file(
+            {
+                "model.diffusion_model.out.0.weight": torch.ones(2, dtype=torch.float32),
+                "model.diffusion_model.out.0.bias": torch.zeros(2, dtype=torch.float32),
+                "model.diffusion_model.steps": torch.arange(3),
+            },
+            self.checkpoint_file,
+        )
+
+    def tearDown(self):
+        super().tearDown()
+        self.tmpdir.cleanup()
+
+    def test_get(self):
+        checkpoint = LazySafetensorsStateDict(self.checkpoint_file)
+
+        assert len(checkpoint) == 3
+        assert "model.diffusion_model.out.0.weight" in checkpoint
+        assert "model.diffusion_model.out.1.weight" not in checkpoint
+        assert torch.equal(checkpoint["model.diffusion_model.out.0.weight"], torch.ones(2))
+
+        with self.assertRaises(KeyError):
+            checkpoint["model.diffusion_model.out.1.weight"]
+
+        close_checkpoint(checkpoint)
+
+    def test_torch_dtype_only_casts_floating_point_tensors(self):
+        checkpoint = LazySafetensorsStateDict(self.checkpoint_file, torch_dtype=torch.float16)
+
+        assert checkpoint["model.diffusion_model.out.0.weight"].dtype == torch.float16
+        assert checkpoint["model.diffusion_model.steps"].dtype == torch.int64
+
+        close_checkpoint(checkpoint)
+
+    def test_pop_and_set(self):
+        checkpoint = LazySafetensorsStateDict(self.checkpoint_file)
+
+        bias = checkpoint.pop("model.diffusion_model.out.0.bias")
+        assert torch.equal(bias, torch.zeros(2))
+        assert "model.diffusion_model.out.0.bias" not in checkpoint
+        assert len(checkpoint) == 2
+
+        checkpoint["model.diffusion_model.out.0.bias"] = torch.ones(2)
+        assert torch.equal(checkpoint["model.diffusion_model.out.0.bias"], torch.ones(2))
+        assert len(checkpoint) == 3
+
+        close_checkpoint(checkpoint)
+
+    def test_pop_while_iterating(self):
+        checkpoint = LazySafetensorsStateDict(self.checkpoint_file)
+
+        for key in checkpoint:
+            checkpoint.pop(key)
+
+        assert len(checkpoint) == 0
+
+        close_checkpoint(checkpoint)
+
+    def test_git_lfs_pointer_raises_os_error(self):
+        pointer_file = os.path.join(self.tmpdir.name, "pointer.safetensors")
+        with open(pointer_file, "w") as f:
+            f.write("version https://git-lfs.github.com/spec/v1\n")
+
+        with self.assertRaises(OSError):
+            load_checkpoint_file(pointer_file)
+
+
+class LoadCheckpointFileTests(unittest.TestCase):
+    def setUp(self):
+        super().setUp()
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.state_dict = {
+            "model.diffusion_model.out.0.weight": torch.randn(2, 2),
+            "model.diffusion_model.out.0.bias": torch.randn(2),
+        }
+
+    def tearDown(self):
+        super().tearDown()
+        self.tmpdir.cleanup()
+
+    def check_checkpoint(self, checkpoint):
+        assert set(checkpoint.keys()) == set(self.state_dict.keys())
+        for key, value in self.state_dict.items():
+            assert torch.equal(checkpoint[key], value)
+
+    def test_zipfile_ckpt(self):
+        checkpoint_file = os.path.join(self.tmpdir.name, "model.ckpt")
+        torch.save(self.state_dict, checkpoint_file)
+
+        self.check_checkpoint(load_checkpoint_file(checkpoint_file))
+
+    def test_legacy_ckpt(self):
+        checkpoint_file = os.path.join(self.tmpdir.name, "model.ckpt")
+        torch.save(self.state_dict, checkpoint_file, _use_new_zipfile_serialization=False)
+
+        self.check_checkpoint(load_checkpoint_file(checkpoint_file))
+
+    def test_nested_state_dict(self):
+        checkpoint_file = os.path.join(self.tmpdir.name, "model.ckpt")
+        torch.save({"state_dict": self.state_dict}, checkpoint_file)
+
+        self.check_checkpoint(load_single_file_model_checkpoint(checkpoint_file))
+
+    def test_checkpoint_is_closed_when_config_fetching_fails(self):
+        checkpoint_file = os.path.join(self.tmpdir.name, "model.safetensors")
+        save_file(self.state_dict, checkpoint_file)
+
+        with mock.patch.object(LazySafetensorsStateDict, "close", autospec=True) as close:
+            with self.assertRaises(ValueError):
+                fetch_ldm_config_and_checkpoint(
+                    checkpoint_file, "StableDiffusionPipeline", original_config_file="not a file or url"
+                )
+
+        close.assert_called_once()
+
+
+class TinyModel(torch.nn.Module):
+    def __init__(self):
+        super().__init__()
+        self.linear = torch.nn.Linear(2, 2)
+        self.register_buffer("steps", torch.zeros(3, dtype=torch.int64))
+
+
+@unittest.skipIf(not is_torch_version(">=", "2.1.0"), "`load_state_dict(..., assign=True)` requires PyTorch 2.1")
+class AssignStateDictToModelTests(unittest.TestCase):
+    def get_state_dict(self, dtype):
+        return {
+            "linear.weight": torch.randn(2, 2).to(dtype),
+            "linear.bias": torch.randn(2).to(dtype),
+            "steps": torch.arange(3),
+        }
+
+    def test_half_precision_checkpoint_is_loaded_in_float32(self):
+        model = TinyModel()
+        assign_state_dict_to_model(model, self.get_state_dict(torch.float16))
+
+        assert model.linear.weight.dtype == torch.float32
+        assert model.linear.bias.dtype == torch.float32
+
+    def test_torch_dtype(self):
+        model = TinyModel()
+        assign_state_dict_to_model(model, self.get_state_dict(torch.float32), torch_dtype=torch.float16)
+
+        assert model.linear.weight.dtype == torch.float16
+        assert model.linear.bias.dtype == torch.float16
+
+    def test_integer_tensors_keep_their_dtype(self):
+        model = TinyModel()
+        assign_state_dict_to_model(model, self.get_state_dict(torch.float16), torch_dtype=torch.float16)
+
+        assert model.steps.dtype == torch.int64
+        assert torch.equal(model.steps, torch.arange(3))
+
+    def test_matching_dtype_shares_storage(self):
+        model = TinyModel()
+        state_dict = self.get_state_dict(torch.float16)
+        assign_state_dict_to_model(model, state_dict, torch_dtype=torch.float16)
+
+        assert model.linear.weight.data_ptr() == state_dict["linear.weight"].data_ptr()
+        assert model.steps.data_ptr() == state_dict["steps"].data_ptr()
+
+
+class StateDictPrefixViewTests(unittest.TestCase):
+    def get_state_dict(self):
+        return {
+            "first_stage_model.encoder.conv_in.weight": torch.ones(2),
+            "first_stage_model.encoder.conv_in.bias": torch.zeros(2),
+            "model.diffusion_model.out.0.weight": torch.ones(3),
+        }
+
+    def test_view_strips_prefix(self):
+        state_dict = self.get_state_dict()
+        view = StateDictPrefixView(state_dict, "first_stage_model.")
+
+        assert len(view) == 2
+        assert sorted(view) == ["encoder.conv_in.bias", "encoder.conv_in.weight"]
+        assert "encoder.conv_in.weight" in view
+        assert "model.diffusion_model.out.0.weight" not in view
+        assert view["encoder.conv_in.weight"] is state_dict["first_stage_model.encoder.conv_in.weight"]
+
+        with self.assertRaises(KeyError):
+            view["out.0.weight"]
+
+    def test_pop_does_not_modify_state_dict(self):
+        state_dict = self.get_state_dict()
+        view = StateDictPrefixView(state_dict, "first_stage_model.")
+
+        weight = view.pop("encoder.conv_in.weight")
+
+        assert weight is state_dict["first_stage_model.encoder.conv_in.weight"]
+        assert "encoder.conv_in.weight" not in view
+        assert len(view) == 1
+        assert len(state_dict) == 3
+
+    def test_set_does_not_modify_state_dict(self):
+        state_dict = self.get_state_dict()
+        view = StateDictPrefixView(state_dict, "first_stage_model.")
+
+        view["encoder.conv_in.weight"] = torch.zeros(2)
+
+        assert torch.equal(view["encoder.conv_in.weight"], torch.zeros(2))
+        assert torch.equal(state_dict["first_stage_model.encoder.conv_in.weight"], torch.ones(2))
+
+    def test_pop_while_iterating(self):
+        state_dict = self.get_state_dict()
+        view = StateDictPrefixView(state_dict, "first_stage_model.")
+
+        for key in view:
+            view.pop(key)
+
+        assert len(view) == 0
+        assert len(state_dict) == 3
+
+    def test_empty_prefix(self):
+        state_dict = self.get_state_dict()
+        view = StateDictPrefixView(state_dict, "")
+
+        assert set(view) == set(state_dict)
+
+
+class ExtractRepoIdAndWeightsNameTests(unittest.TestCase):
+    def test_valid_url_prefixes(self):
+        for url in [
+            "https://huggingface.co/runwayml/stable-diffusion-v1-5/blob/main/v1-5-pruned-emaonly.safetensors",
+            "huggingface.co/runwayml/stable-diffusion-v1-5/blob/main/v1-5-pruned-emaonly.safetensors",
+            "https://hf.co/runwayml/stable-diffusion-v1-5/blob/main/v1-5-pruned-emaonly.safetensors",
+            "hf.co/runwayml/stable-diffusion-v1-5/blob/main/v1-5-pruned-emaonly.safetensors",
+        ]:
+            repo_id, weights_name = _extract_repo_id_and_weights_name(url)
+            assert repo_id == "runwayml/stable-diffusion-v1-5", url
+            assert weights_name == "v1-5-pruned-emaonly.safetensors", url
+
+    def test_weights_name_in_subfolder(self):
+        repo_id, weights_name = _extract_repo_id_and_weights_name(
+            "https://hf.co/WarriorMama777/OrangeMixs/blob/main/Models/AbyssOrangeMix/AbyssOrangeMix.safetensors"
+        )
+        assert repo_id == "WarriorMama777/OrangeMixs"
+        assert weights_name == "Models/AbyssOrangeMix/AbyssOrangeMix.safetensors"
+
+
+class CreateSchedulerFromLDMTests(unittest.TestCase):
+    def get_original_config(self, **params):
+        return {"model": {"params": {"linear_start": 0.00085, "linear_end": 0.012, **params}}}
+
+    def test_default_scheduler_config_is_a_copy(self):
+        scheduler_config = get_default_scheduler_config()
+        assert scheduler_config is not SCHEDULER_DEFAULT_CONFIG
+
+        scheduler_config["num_train_timesteps"] = 500
+        assert SCHEDULER_DEFAULT_CONFIG["num_train_timesteps"] == 1000
+
+    def test_timesteps_from_original_config(self):
+        components = create_scheduler_from_ldm(
+            "StableDiffusionPipeline", self.get_original_config(timesteps=500), checkpoint={}, model_type="v1"
+        )
+        assert components["scheduler"].config.num_train_timesteps == 500
+
+        components = create_scheduler_from_ldm(
+            "StableDiffusionPipeline", self.get_original_config(), checkpoint={}, model_type="v1"
+        )
+        assert components["scheduler"].config.num_train_timesteps == 1000
+
+    def test_create_scheduler_does_not_modify_default_config(self):
+        default_config = dict(SCHEDULER_DEFAULT_CONFIG)
+        create_scheduler_from_ldm(
+            "StableDiffusionPipeline", self.get_original_config(timesteps=500), checkpoint={}, model_type="v1"
+        )
+        assert SCHEDULER_DEFAULT_CONFIG == default_config
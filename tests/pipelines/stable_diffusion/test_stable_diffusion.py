@@ -19,6 +19,7 @@ import tempfile
 import time
 import traceback
 import unittest
+from unittest import mock
 
 import numpy as np
 import torch
@@ -1340,6 +1341,41 @@ class StableDiffusionPipelineCkptTests(unittest.TestCase):
                 pipe.safety_checker.config.to_dict()[param_name] == param_value
             ), f"{param_name} differs between single file loading and pretrained loading"
 
+    def test_single_file_parallel_loading_is_same(self):
+        ckpt_path = "https://huggingface.co/runwayml/stable-diffusion-v1-5/blob/main/v1-5-pruned-emaonly.safetensors"
+
+        with mock.patch("diffusers.loaders.single_file.DIFFUSERS_SINGLE_FILE_PARALLEL", False):
+            sequential_pipe = StableDiffusionPipeline.from_single_file(ckpt_path, load_safety_checker=True)
+        with mock.patch("diffusers.loaders.single_file.DIFFUSERS_SINGLE_FILE_PARALLEL", True):
+            parallel_pipe = StableDiffusionPipeline.from_single_file(ckpt_path, load_safety_checker=True)
+
+        assert sequential_pipe.components.keys() == parallel_pipe.components.keys()
+        for name, component in sequential_pipe.components.items():
+            parallel_component = parallel_pipe.components[name]
+            assert type(component) is type(parallel_component), f"{name} differs between loading modes"
+
+            if isinstance(component, torch.nn.Module):
+                parallel_state_dict = parallel_component.state_dict()
+                for key, value in component.state_dict().items():
+                    assert torch.equal(value, parallel_state_dict[key]), f"{name}.{key} differs"
+            elif hasattr(component, "config"):
+                assert dict(component.config) == dict(parallel_component.config)
+
+    def test_single_file_loading_on_device(self):
+        ckpt_path = "https://huggingface.co/runwayml/stable-diffusion-v1-5/blob/main/v1-5-pruned-emaonly.safetensors"
+
+        for torch_dtype in [None, torch.float16]:
+            pipe = StableDiffusionPipeline.from_single_file(
+                ckpt_path, device="cuda", torch_dtype=torch_dtype, load_safety_checker=True
+            )
+            expected_device = torch.device("cuda", torch.cuda.current_device())
+
+            for name, component in pipe.components.items():
+                if not isinstance(component, torch.nn.Module):
+                    continue
+                for tensor_name, tensor in list(component.named_parameters()) + list(component.named_buffers()):
+                    assert tensor.device == expected_device, f"{name}.{tensor_name} is on {tensor.device}"
+
 
 @nightly
 @require_torch_gpu